@@ -1,7 +1,10 @@
+import os
+import time
 import streamlit as st
 from services.db_service import QuizDatabase
-from views.teacher_view import teacher_view
-from views.student_view import student_view
+from services.snapshot_service import SnapshotService
+# Views are imported inside their branches below: each pulls in altair and/or
+# the component packages, which the landing page never needs.
 
 # Page Config
 st.set_page_config(page_title="Classroom Quiz", page_icon="📝", layout="wide")
@@ -10,7 +13,22 @@ st.set_page_config(page_title="Classroom Quiz", page_icon="📝", layout="wide")
 # We cache the resource to prevent reloading connection on every rerun
 @st.cache_resource
 def get_db():
-    return QuizDatabase()
+    db = QuizDatabase()
+    # Rebuilding a missing quiz.db from the last snapshot is opt-in, since deleting
+    # quiz.db is also how a fresh class is started. Snapshots are only kept then.
+    snapshots = SnapshotService(db, rebuild_missing_db=os.environ.get("QUIZ_REBUILD_FROM_SNAPSHOT") == "1")
+    snapshots.restore()
+    snapshots.start()
+    # Load what every reconnecting student reads before the first rerun asks for it
+    db.warm_cache()
+    # Set QUIZ_RECORD_DIR to log this lecture for benchmarks/replay_lecture.py
+    record_dir = os.environ.get("QUIZ_RECORD_DIR")
+    if record_dir:
+        from services.replay_service import LectureRecorder
+        os.makedirs(record_dir, exist_ok=True)
+        log_path = os.path.join(record_dir, time.strftime("lecture-%Y%m%d-%H%M%S.log.gz"))
+        return LectureRecorder(log_path).wrap(db)
+    return db
 
 db = get_db()
 
@@ -27,6 +45,7 @@ if role == "teacher":
         st.session_state.admin_authenticated = False
 
     if st.session_state.admin_authenticated:
+        from views.teacher_view import teacher_view
         teacher_view(db)
     else:
         st.title("🔒 Admin Login")
@@ -38,6 +57,7 @@ if role == "teacher":
             else:
                 st.error("Incorrect password")
 elif role == "student":
+    from views.student_view import student_view
     student_view(db)
 else:
     # Landing Page
@@ -0,0 +1,84 @@
+# Cold-start benchmark: how long until a restarted server has answered one rerun
+# for every student, with lazily filled caches, with caches warmed before the
+# first rerun, and when rebuilding a lost DB file from a snapshot.
+#
+# Usage: python -m benchmarks.bench_cold_start [students] [questions]
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.db_service import QuizDatabase
+from services.snapshot_service import SnapshotService
+
+
+def populate(db, students, questions):
+    with db._get_conn() as conn:
+        conn.executemany("INSERT INTO users (username, score) VALUES (?, ?)",
+                         [(f"student{i}", i % questions) for i in range(students)])
+        conn.executemany("INSERT INTO responses (question_id, username, selected_option) VALUES (?, ?, ?)",
+                         [(q, f"student{i}", "ABCD"[(i + q) % 4])
+                          for q in range(1, questions + 1) for i in range(students)])
+        conn.commit()
+    db.update_room_state(current_question_id=questions, is_active=True)
+
+
+def rerun_student(db, username, question_id):
+    # What one student's first rerun after a restart reads
+    db.get_room_state()
+    db.get_user_response(question_id, username)
+    db.get_user_score(username)
+    db.get_response_counts(question_id)
+    db.get_leaderboard(limit=100)
+
+
+def rerun_all_students(db, students, question_id):
+    # After a restart every open browser reconnects within the same autorefresh tick
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        for future in [pool.submit(rerun_student, db, f"student{i}", question_id) for i in range(students)]:
+            future.result()
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    questions = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "quiz.db")
+        db = QuizDatabase(db_path)
+        populate(db, students, questions)
+        snapshots = SnapshotService(db, rebuild_missing_db=True)
+        snapshots.save(force=True)
+        size = os.path.getsize(snapshots.snapshot_path)
+        print(f"{students} students x {questions} questions")
+        print(f"snapshot: {size} bytes, saved in {snapshots.last_save_seconds * 1000:.1f} ms")
+
+        started = time.perf_counter()
+        rerun_all_students(QuizDatabase(db_path), students, questions)
+        print(f"cold start, lazy caches:   {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        # The herd's wall time is what students see; warm-up runs before it, at startup
+        warm_db = QuizDatabase(db_path)
+        started = time.perf_counter()
+        warm_db.warm_cache()
+        warmed = time.perf_counter()
+        rerun_all_students(warm_db, students, questions)
+        print(f"cold start, warmed caches: {(time.perf_counter() - warmed) * 1000:.1f} ms "
+              f"(+{(warmed - started) * 1000:.1f} ms warm-up at startup)")
+
+        # Lost DB file: rebuild it from the snapshot
+        os.remove(db_path)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        started = time.perf_counter()
+        recovered_db = QuizDatabase(db_path)
+        SnapshotService(recovered_db, rebuild_missing_db=True).restore()
+        recovered_db.warm_cache()
+        rerun_all_students(recovered_db, students, questions)
+        print(f"recovery from snapshot:    {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
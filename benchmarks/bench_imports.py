@@ -0,0 +1,59 @@
+# Import-time benchmark: cold import cost and peak memory of each entry path,
+# every scenario measured in a fresh interpreter.
+#
+# Usage: python -m benchmarks.bench_imports [repeats]
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LANDING = ["streamlit", "services.db_service", "services.snapshot_service"]
+SCENARIOS = {
+    # What app.py imported up front before views were loaded lazily
+    "eager (all views + pandas)": LANDING + ["pandas", "views.teacher_view", "views.student_view"],
+    "landing page": LANDING,
+    "student voting": LANDING + ["views.student_view"],
+    "teacher dashboard": LANDING + ["views.teacher_view"],
+}
+
+CHILD = """
+import importlib, resource, sys, time
+started = time.perf_counter()
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - started
+# ru_maxrss is KiB on Linux, bytes on macOS
+maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    maxrss //= 1024
+print(elapsed, maxrss)
+"""
+
+
+def measure(modules):
+    result = subprocess.run([sys.executable, "-c", CHILD, *modules], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    elapsed, maxrss = result.stdout.split()
+    return float(elapsed), int(maxrss)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'scenario':<28}{'import ms':>12}{'peak RSS MiB':>14}")
+    for name, modules in SCENARIOS.items():
+        try:
+            runs = [measure(modules) for _ in range(repeats)]
+        except RuntimeError as e:
+            print(f"{name:<28}skipped ({e})")
+            continue
+        elapsed = statistics.median(run[0] for run in runs) * 1000
+        maxrss = statistics.median(run[1] for run in runs) / 1024
+        print(f"{name:<28}{elapsed:>12.1f}{maxrss:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Replays a lecture recorded with QUIZ_RECORD_DIR against a fresh database and
+# prints a latency histogram per QuizDatabase method.
+#
+# Usage: python -m benchmarks.replay_lecture LOG [--speed 1|10|max] [--concurrency N] [--db PATH]
+import argparse
+import os
+import tempfile
+import time
+
+from services.db_service import QuizDatabase
+from services.replay_service import format_histogram, load_log, replay
+
+
+def parse_speed(value):
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded lecture against a fresh database.")
+    parser.add_argument("log", help="lecture-*.log.gz written by the recorder")
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="time scale: 1 = real time, 10 = ten times faster, max = no waiting")
+    parser.add_argument("--concurrency", type=int, default=8, help="worker threads issuing calls")
+    parser.add_argument("--db", help="database file to replay into (default: fresh temp file)")
+    args = parser.parse_args()
+
+    header, events = load_log(args.log)
+    duration_s = events[-1][0] / 1000 if events else 0
+    speed_label = "max" if args.speed is None else f"{args.speed:g}x"
+    recorded_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(header["started_at"]))
+    print(f"{len(events)} calls over {duration_s:.1f}s recorded {recorded_at}, replaying at {speed_label} "
+          f"with {args.concurrency} workers")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The per-user vote limit runs on wall-clock time, so it would throttle
+        # votes that were fine at the recorded pace
+        db = QuizDatabase(args.db or os.path.join(tmp, "replay.db"), vote_limiter=None)
+        started = time.perf_counter()
+        latencies, errors, rejected_votes = replay(events, db, speed=args.speed, concurrency=args.concurrency)
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f"done in {elapsed:.2f}s ({rate:.0f} calls/s), {errors} errors, {rejected_votes} rejected votes\n")
+    for method in sorted(latencies):
+        print(format_histogram(method, latencies[method]))
+    print(format_histogram("all", [value for values in latencies.values() for value in values]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second, capacity):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class VoteRateLimiter:
+    """Per-user token buckets: a burst of `burst` votes, then one every 1/rate seconds."""
+
+    def __init__(self, rate_per_second=0.5, burst=3):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.counters = {"votes_accepted": 0, "votes_throttled": 0}
+
+    def allow(self, username):
+        with self._lock:
+            bucket = self._buckets.get(username)
+            if bucket is None:
+                bucket = self._buckets[username] = TokenBucket(self.rate_per_second, self.burst)
+            allowed = bucket.try_acquire()
+            self.counters["votes_accepted" if allowed else "votes_throttled"] += 1
+            return allowed
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class AdmissionController:
+    """Bounds concurrent DB reads.
+
+    Identical reads (same key) that arrive while one is in flight wait for it
+    and share its result instead of querying again. When `max_in_flight`
+    distinct reads are already running, a read that has an earlier result is
+    shed: it gets that (possibly stale) result without touching the DB.
+
+    Callers must forget() a key when they write to it: from then on no result
+    loaded before the write is shared or shed for that key.
+    """
+
+    def __init__(self, max_in_flight=4):
+        self.max_in_flight = max_in_flight
+        self._in_flight = {}
+        self._last_results = {}
+        # Bumped by forget(); a load only remembers its result if no forget() hit its key meanwhile
+        self._epoch = 0
+        self._key_epochs = {}
+        self._lock = threading.Lock()
+        self.counters = {"reads_executed": 0, "reads_coalesced": 0, "reads_shed": 0, "peak_in_flight": 0}
+
+    def run(self, key, loader):
+        with self._lock:
+            call = self._in_flight.get(key)
+            if call is not None:
+                self.counters["reads_coalesced"] += 1
+                is_leader = False
+            elif len(self._in_flight) >= self.max_in_flight and key in self._last_results:
+                self.counters["reads_shed"] += 1
+                return self._last_results[key]
+            else:
+                call = self._in_flight[key] = _Call()
+                is_leader = True
+                epoch = (self._epoch, self._key_epochs.get(key, 0))
+                self.counters["reads_executed"] += 1
+                self.counters["peak_in_flight"] = max(self.counters["peak_in_flight"], len(self._in_flight))
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = loader()
+            with self._lock:
+                if epoch == (self._epoch, self._key_epochs.get(key, 0)):
+                    self._last_results[key] = call.result
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # forget() may already have detached this call
+                if self._in_flight.get(key) is call:
+                    del self._in_flight[key]
+            call.done.set()
+
+    def forget(self, *keys):
+        """Drop remembered and in-flight results for `keys` (all keys if none given).
+
+        Readers arriving after this never get a result loaded before it: they
+        start a new load instead of joining or being shed.
+        """
+        with self._lock:
+            if not keys:
+                self._epoch += 1
+                self._last_results.clear()
+                self._in_flight.clear()
+            for key in keys:
+                self._key_epochs[key] = self._key_epochs.get(key, 0) + 1
+                self._last_results.pop(key, None)
+                self._in_flight.pop(key, None)
@@ -1,22 +1,49 @@
+import os
 import sqlite3
-import pandas as pd
-from datetime import datetime
+import threading
+from services.admission_service import AdmissionController, VoteRateLimiter
+from services.results_service import ResultsPublisher
+
+OPTIONS = ['A', 'B', 'C', 'D']
 
 class QuizDatabase:
-    def __init__(self, db_path="quiz.db"):
+    # Durability per vote (a vote counts once submit_response() returns True):
+    # - durable=False (default): WAL + synchronous=NORMAL. A committed vote survives
+    #   a crash/restart of the Streamlit process, but the last few commits may be
+    #   lost on an OS crash or power cut.
+    # - durable=True: WAL + synchronous=FULL. A committed vote also survives power
+    #   loss, at the cost of an fsync per vote.
+    # Snapshots (services/snapshot_service.py) are only used, when explicitly enabled,
+    # to rebuild a lost DB file; they never weaken the guarantee above.
+    def __init__(self, db_path="quiz.db", durable=False, vote_limiter=True):
         self.db_path = db_path
+        self.durable = durable
+        self.is_new = not os.path.exists(db_path)
+        # In-process read cache shared by every session (app.py keeps one instance
+        # via st.cache_resource). All writes go through this object and keep it in sync.
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        # Bumped on every write so snapshotting can skip unchanged state
+        self.write_version = 0
+        # Cache misses go through the admission controller; votes through the limiter.
+        # vote_limiter=None disables throttling (e.g. for accelerated replays).
+        self.admission = AdmissionController()
+        self.vote_limiter = VoteRateLimiter() if vote_limiter is True else vote_limiter
+        # Precomputed reveal results that every student rerun reads from memory
+        self.results = ResultsPublisher(self)
         self._init_db()
 
     def _get_conn(self):
         # Increased timeout to 30s to wait for locks instead of failing immediately
-        return sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0)
+        # synchronous is a per-connection setting, so it has to be applied here
+        conn.execute("PRAGMA synchronous=FULL;" if self.durable else "PRAGMA synchronous=NORMAL;")
+        return conn
 
     def _init_db(self):
         with self._get_conn() as conn:
             # Enable Write-Ahead Logging (WAL) for better concurrency
             conn.execute("PRAGMA journal_mode=WAL;")
-            # Relax synchronization for speed (safe for non-critical crashes)
-            conn.execute("PRAGMA synchronous=NORMAL;")
             
             cursor = conn.cursor()
             
@@ -64,19 +91,117 @@ class QuizDatabase:
             """)
             conn.commit()
 
-    # --- Room State Methods ---
-    def get_room_state(self):
+    # --- Cache Helpers ---
+    def _read_through(self, key, loader):
+        # Cache miss: read from the DB, but only cache the value if no write landed
+        # while we were reading (it could predate that write, e.g. miss a vote)
+        with self._cache_lock:
+            value = self._cache.get(key)
+            if value is not None:
+                return value
+            version = self.write_version
+        value = loader()
+        with self._cache_lock:
+            if self.write_version == version:
+                value = self._cache.setdefault(key, value)
+        return value
+
+    def _load_cached(self, key, loader):
+        # Refresh reads: identical concurrent misses share one query, and under load
+        # a refresh may be answered with the previous result (see AdmissionController)
+        with self._cache_lock:
+            value = self._cache.get(key)
+            if value is not None:
+                return value
+        return self.admission.run(key, lambda: self._read_through(key, loader))
+
+    def get_load_stats(self):
+        """Counters for throttled votes and coalesced/shed reads."""
+        vote_counters = self.vote_limiter.counters if self.vote_limiter else {"votes_accepted": 0, "votes_throttled": 0}
+        return {**vote_counters, **self.admission.counters}
+
+    def _invalidate(self, *keys):
+        with self._cache_lock:
+            self.write_version += 1
+            if not keys:
+                self._cache.clear()
+            for key in keys:
+                self._cache.pop(key, None)
+        # Nothing loaded before this write may be shed or shared afterwards
+        self.admission.forget(*keys)
+
+    # --- Snapshot Support ---
+    # State dicts hold room_state, users [(username, score)] and
+    # responses [(question_id, username, selected_option)].
+    def dump_state(self):
+        """Read the whole room in a single transaction."""
         with self._get_conn() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT current_question_id, is_active, correct_answer, start_time, duration_seconds FROM room_state WHERE id=1")
-            row = cursor.fetchone()
-            return {
-                "current_question_id": row[0],
-                "is_active": bool(row[1]),
-                "correct_answer": row[2],
-                "start_time": row[3],
-                "duration_seconds": row[4] if row[4] else 60
-            }
+            cursor.execute("BEGIN")
+            room_state = self._read_room_state(cursor)
+            cursor.execute("SELECT username, score FROM users")
+            users = cursor.fetchall()
+            cursor.execute("SELECT question_id, username, selected_option FROM responses ORDER BY id")
+            responses = cursor.fetchall()
+            conn.rollback()
+        return {"room_state": room_state, "users": users, "responses": responses}
+
+    def load_state(self, state):
+        """Replace the DB contents with a previously dumped state (crash recovery)."""
+        room_state = state["room_state"]
+        with self._get_conn() as conn:
+            conn.execute("DELETE FROM responses")
+            conn.execute("DELETE FROM users")
+            conn.execute(
+                "UPDATE room_state SET current_question_id = ?, is_active = ?, correct_answer = ?, start_time = ?, duration_seconds = ? WHERE id=1",
+                (room_state["current_question_id"], int(room_state["is_active"]), room_state["correct_answer"],
+                 room_state["start_time"], room_state["duration_seconds"]))
+            conn.executemany("INSERT INTO users (username, score) VALUES (?, ?)", state["users"])
+            conn.executemany("INSERT INTO responses (question_id, username, selected_option) VALUES (?, ?, ?)", state["responses"])
+            conn.commit()
+        self._invalidate()
+
+    def warm_cache(self):
+        """Pre-load everything a student rerun reads, so the first autorefresh after a
+        restart doesn't send the whole class to the DB at once."""
+        with self._cache_lock:
+            version = self.write_version
+        room_state = self._load_room_state()
+        ranking = self._load_ranking()
+        # Reruns only read the live question and the one just revealed; older
+        # questions are loaded lazily if anyone asks for them
+        current_q_id = room_state["current_question_id"]
+        votes = {question_id: self._load_votes(question_id) for question_id in (current_q_id, current_q_id - 1)}
+        with self._cache_lock:
+            # A write raced the warm-up: leave those entries to the lazy loaders
+            if self.write_version != version:
+                return
+            self._cache["room_state"] = room_state
+            self._cache["leaderboard"] = ranking
+            self._cache["scores"] = dict(ranking)
+            for question_id, question_votes in votes.items():
+                self._cache[("votes", question_id)] = question_votes
+
+    # --- Room State Methods ---
+    def _read_room_state(self, cursor):
+        cursor.execute("SELECT current_question_id, is_active, correct_answer, start_time, duration_seconds FROM room_state WHERE id=1")
+        row = cursor.fetchone()
+        return {
+            "current_question_id": row[0],
+            "is_active": bool(row[1]),
+            "correct_answer": row[2],
+            "start_time": row[3],
+            "duration_seconds": row[4] if row[4] else 60
+        }
+
+    def _load_room_state(self):
+        with self._get_conn() as conn:
+            return self._read_room_state(conn.cursor())
+
+    def get_room_state(self):
+        room_state = self._load_cached("room_state", self._load_room_state)
+        # Callers may mutate the dict, never hand out the cached one
+        return dict(room_state)
 
     def update_room_state(self, current_question_id=None, is_active=None, correct_answer=None, start_time=None, duration_seconds=None):
         updates = []
@@ -102,6 +227,7 @@ class QuizDatabase:
             with self._get_conn() as conn:
                 conn.execute(query, params)
                 conn.commit()
+            self._invalidate("room_state")
 
     def reset_game(self):
         with self._get_conn() as conn:
@@ -109,6 +235,10 @@ class QuizDatabase:
             conn.execute("DELETE FROM responses")
             conn.execute("DELETE FROM users")
             conn.commit()
+        self._invalidate()
+        if self.vote_limiter:
+            self.vote_limiter.reset()
+        self.results.invalidate()
 
     # --- User Methods ---
     def register_user(self, username):
@@ -116,26 +246,39 @@ class QuizDatabase:
             return False
         try:
             with self._get_conn() as conn:
-                conn.execute("INSERT OR IGNORE INTO users (username, score) VALUES (?, 0)", (username,))
+                cursor = conn.execute("INSERT OR IGNORE INTO users (username, score) VALUES (?, 0)", (username,))
                 conn.commit()
+            if cursor.rowcount:
+                self._invalidate("leaderboard", "scores")
             return True
         except Exception:
             return False
 
     def get_user_score(self, username):
+        scores = self._load_cached("scores", lambda: dict(self._get_ranking()))
+        return scores.get(username, 0)
+
+    def _load_ranking(self):
         with self._get_conn() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT score FROM users WHERE username = ?", (username,))
-            row = cursor.fetchone()
-            return row[0] if row else 0
+            cursor.execute("SELECT username, score FROM users ORDER BY score DESC")
+            return cursor.fetchall()
+
+    def _get_ranking(self):
+        # Full (username, score) list sorted by score, shared by every leaderboard size
+        return self._load_cached("leaderboard", self._load_ranking)
 
     def get_leaderboard(self, limit=10):
-        with self._get_conn() as conn:
-            df = pd.read_sql_query(f"SELECT username, score FROM users ORDER BY score DESC LIMIT {limit}", conn)
-            return df
+        # limit=None returns every user.
+        # Plain rows (no pandas on the DB path); st.dataframe renders them directly
+        return [{"username": username, "score": score} for username, score in self._get_ranking()[:limit]]
 
     # --- Response Methods ---
     def submit_response(self, question_id, username, selected_option):
+        # Each vote is a commit, so bound how fast a single user can fire them
+        if self.vote_limiter and not self.vote_limiter.allow(username):
+            return False
+
         # Retry logic for handling high concurrency locks
         import time
         import random
@@ -149,6 +292,12 @@ class QuizDatabase:
                         VALUES (?, ?, ?)
                     """, (question_id, username, selected_option))
                     conn.commit()
+                with self._cache_lock:
+                    self.write_version += 1
+                    votes = self._cache.get(("votes", question_id))
+                    if votes is not None:
+                        votes[username] = selected_option
+                self.admission.forget(("votes", question_id))
                 return True
             except sqlite3.OperationalError as e:
                 if "locked" in str(e).lower():
@@ -163,26 +312,50 @@ class QuizDatabase:
                 return False
         return False
 
-    def get_response_counts(self, question_id):
+    def _load_votes(self, question_id):
         with self._get_conn() as conn:
-            df = pd.read_sql_query("""
-                SELECT selected_option, COUNT(*) as count 
-                FROM responses 
-                WHERE question_id = ? 
-                GROUP BY selected_option
-            """, conn, params=(question_id,))
-            
-            # Ensure all options are present for the chart
-            options = pd.DataFrame({'selected_option': ['A', 'B', 'C', 'D']})
-            df = options.merge(df, on='selected_option', how='left').fillna(0)
-            return df
+            cursor = conn.cursor()
+            cursor.execute("SELECT username, selected_option FROM responses WHERE question_id = ?", (question_id,))
+            return dict(cursor.fetchall())
+
+    def _get_votes(self, question_id):
+        # {username: selected_option} for one question, loaded once and then kept
+        # up to date by submit_response
+        return self._load_cached(("votes", question_id), lambda: self._load_votes(question_id))
+
+    @staticmethod
+    def _count_options(selected):
+        # Ensure all options are present for the chart
+        counts = {option: 0 for option in OPTIONS}
+        for option in selected:
+            if option in counts:
+                counts[option] += 1
+        return [{"selected_option": option, "count": counts[option]} for option in OPTIONS]
+
+    def get_response_counts(self, question_id):
+        votes = self._get_votes(question_id)
+        with self._cache_lock:
+            selected = list(votes.values())
+        return self._count_options(selected)
+
+    def get_reveal_inputs(self, question_id):
+        """Votes {username: option}, counts and full leaderboard rows for building results.
+
+        Unlike the refresh reads these bypass the admission controller: a shed or
+        coalesced read could predate calculate_scores and freeze stale scores into
+        the results payload.
+        """
+        votes = self._read_through(("votes", question_id), lambda: self._load_votes(question_id))
+        ranking = self._read_through("leaderboard", self._load_ranking)
+        with self._cache_lock:
+            votes = dict(votes)
+        counts = self._count_options(votes.values())
+        return votes, counts, [{"username": username, "score": score} for username, score in ranking]
 
     def get_user_response(self, question_id, username):
-        with self._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT selected_option FROM responses WHERE question_id = ? AND username = ?", (question_id, username))
-            row = cursor.fetchone()
-            return row[0] if row else None
+        votes = self._get_votes(question_id)
+        with self._cache_lock:
+            return votes.get(username)
 
     def calculate_scores(self, question_id, correct_option):
         with self._get_conn() as conn:
@@ -199,5 +372,15 @@ class QuizDatabase:
                 placeholders = ','.join(['?'] * len(correct_users))
                 conn.execute(f"UPDATE users SET score = score + 1 WHERE username IN ({placeholders})", correct_users)
                 conn.commit()
+                self._invalidate("leaderboard", "scores")
             
             return len(correct_users)
+
+    # --- Results Methods ---
+    def publish_results(self, question_id, correct_option):
+        """Build the results payload for a revealed question in the background."""
+        return self.results.publish(question_id, correct_option)
+
+    def get_results(self, question_id, correct_option, timeout=5.0):
+        """Precomputed results payload (see ResultsPublisher), or None if still building."""
+        return self.results.get(question_id, correct_option, timeout)
@@ -0,0 +1,208 @@
+import atexit
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# QuizDatabase calls that make up classroom traffic
+RECORDED_METHODS = (
+    "register_user",
+    "get_room_state",
+    "update_room_state",
+    "reset_game",
+    "submit_response",
+    "get_user_response",
+    "get_user_score",
+    "get_leaderboard",
+    "get_response_counts",
+    "calculate_scores",
+    "publish_results",
+    "get_results",
+)
+
+# Calls that change room-wide state. Votes and registrations must land on the
+# same side of them as in the lecture, or the replayed scores drift.
+BARRIER_METHODS = ("update_room_state", "reset_game", "calculate_scores", "publish_results")
+
+# Position of the username argument of per-user calls
+USER_ARGUMENTS = {"register_user": 0, "submit_response": 1, "get_user_response": 1, "get_user_score": 0}
+
+LOG_VERSION = 1
+
+
+class LectureRecorder:
+    """Writes a timed log of QuizDatabase calls to a gzip file.
+
+    Each line is ``[offset_ms, method, args, kwargs]``. Events are buffered and
+    written as a new gzip member every `flush_seconds`, so a crash loses at most
+    the last unflushed batch and the file stays readable.
+    """
+
+    def __init__(self, log_path, flush_seconds=1.0, max_buffered=500):
+        self.log_path = log_path
+        self.flush_seconds = flush_seconds
+        self.max_buffered = max_buffered
+        self._started = time.monotonic()
+        self._last_flush = self._started
+        self._buffer = []
+        self._lock = threading.Lock()
+        header = {"version": LOG_VERSION, "started_at": time.time()}
+        with gzip.open(self.log_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+        atexit.register(self.flush)
+
+    def record(self, method, args, kwargs):
+        offset_ms = round((time.monotonic() - self._started) * 1000, 1)
+        line = json.dumps([offset_ms, method, list(args), kwargs], separators=(",", ":"))
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.max_buffered or time.monotonic() - self._last_flush >= self.flush_seconds:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        with gzip.open(self.log_path, "at", encoding="utf-8") as f:
+            f.write("\n".join(self._buffer) + "\n")
+        self._buffer = []
+
+    def wrap(self, db):
+        return RecordingDatabase(db, self)
+
+
+class RecordingDatabase:
+    """Drop-in proxy for QuizDatabase that logs every RECORDED_METHODS call."""
+
+    def __init__(self, db, recorder):
+        self._db = db
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+        if name not in RECORDED_METHODS:
+            return attr
+
+        def recorded(*args, **kwargs):
+            self._recorder.record(name, args, kwargs)
+            return attr(*args, **kwargs)
+
+        return recorded
+
+
+def load_log(log_path):
+    """Returns (header, events) where events are (offset_ms, method, args, kwargs)."""
+    with gzip.open(log_path, "rt", encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    header = json.loads(lines[0])
+    if header.get("version") != LOG_VERSION:
+        raise ValueError(f"Unsupported lecture log version: {header.get('version')}")
+    events = [tuple(json.loads(line)) for line in lines[1:]]
+    return header, events
+
+
+def _username(method, args, kwargs):
+    position = USER_ARGUMENTS.get(method)
+    if position is None:
+        return None
+    if "username" in kwargs:
+        return kwargs["username"]
+    return args[position] if len(args) > position else None
+
+
+def replay(events, db, speed=1.0, concurrency=8):
+    """Re-drive `db` with recorded events.
+
+    `speed` scales the recorded timing (10 = ten times faster); None replays as
+    fast as the workers allow. BARRIER_METHODS run alone, after every earlier
+    call and before any later one, and each user's calls run in recorded order,
+    so the replay ends in the same state as the lecture.
+
+    Returns {method: [latency_ms, ...]}, the error count and the number of votes
+    submit_response rejected (throttled or locked), which are left out of the
+    latencies. A latency runs from when the call was due (its recorded time, or
+    its submission at max speed) to when it returned, so time spent queued
+    behind busy workers or a barrier counts.
+    """
+    latencies = {}
+    errors = []
+    rejected_votes = []
+    lock = threading.Lock()
+
+    def call(method, args, kwargs, due):
+        try:
+            result = getattr(db, method)(*args, **kwargs)
+        except Exception as e:
+            with lock:
+                errors.append((method, e))
+            return
+        elapsed_ms = (time.perf_counter() - due) * 1000
+        with lock:
+            if method == "submit_response" and result is False:
+                rejected_votes.append(args)
+            else:
+                latencies.setdefault(method, []).append(elapsed_ms)
+
+    # One single-worker lane per unit of concurrency: a user's calls always go
+    # to the same lane, so they can't overtake each other
+    lanes = [ThreadPoolExecutor(max_workers=1, thread_name_prefix="quiz-replay") for _ in range(concurrency)]
+    in_flight = []
+    started = time.perf_counter()
+    try:
+        for index, (offset_ms, method, args, kwargs) in enumerate(events):
+            due = time.perf_counter()
+            if speed:
+                due = started + offset_ms / 1000 / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if method in BARRIER_METHODS:
+                for future in in_flight:
+                    future.result()
+                in_flight = []
+                call(method, args, kwargs, due)
+                continue
+            username = _username(method, args, kwargs)
+            lane = lanes[hash(username) % concurrency if username is not None else index % concurrency]
+            in_flight.append(lane.submit(call, method, args, kwargs, due))
+    finally:
+        for lane in lanes:
+            lane.shutdown()
+    return latencies, len(errors), len(rejected_votes)
+
+
+# Histogram bucket upper bounds in ms
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+def format_histogram(name, values, width=40):
+    if not values:
+        return f"{name}: n=0"
+    values = sorted(values)
+    counts = [0] * len(BUCKETS_MS)
+    bucket = 0
+    for value in values:
+        while value > BUCKETS_MS[bucket]:
+            bucket += 1
+        counts[bucket] += 1
+
+    lines = [
+        f"{name}: n={len(values)} p50={percentile(values, 0.5):.2f}ms "
+        f"p95={percentile(values, 0.95):.2f}ms p99={percentile(values, 0.99):.2f}ms max={values[-1]:.2f}ms"
+    ]
+    peak = max(counts)
+    for bound, count in zip(BUCKETS_MS, counts):
+        if count:
+            label = f"<= {bound:g}ms" if bound != float("inf") else f"> {BUCKETS_MS[-2]:g}ms"
+            lines.append(f"  {label:>10} {count:>7} {'#' * max(1, count * width // peak)}")
+    return "\n".join(lines)
@@ -0,0 +1,108 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+
+class ResultsPublisher:
+    """Builds the results of a revealed question once, off the request path.
+
+    A payload is a plain dict shared by every student rerun (treat it as read-only):
+        version      sequence number of the latest publish (or reset) when it was built
+        question_id, correct_answer, total_votes, correct_count,
+        counts       [{"selected_option", "count"}] for every option
+        leaderboard  top `top_k` rows [{"Rank", "username", "score"}]
+        users        {username: {"answer", "correct", "score", "rank"}}
+    """
+
+    def __init__(self, db, top_k=100):
+        self.db = db
+        self.top_k = top_k
+        # One worker: builds run in reveal order and never race each other
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quiz-results")
+        # Reentrant: a done-callback runs inline if the build already finished
+        self._lock = threading.RLock()
+        # {(question_id, correct_answer): payload}, all built for the current version
+        self._payloads = {}
+        # {(question_id, correct_answer): (version, future)}
+        self._pending = {}
+        # Bumped by every publish and reset, which change scores: payloads built
+        # before are stale. Builds started by get() don't bump it, so looking at
+        # another question never makes the published payload stale.
+        self._version = 0
+
+    def publish(self, question_id, correct_answer):
+        """Start building the payload for a just-revealed question."""
+        with self._lock:
+            self._version += 1
+            self._payloads.clear()
+            return self._submit_locked(question_id, correct_answer)
+
+    def get(self, question_id, correct_answer, timeout=5.0):
+        """The payload for this reveal, or None if it is not ready within `timeout` or the build failed."""
+        key = (question_id, correct_answer)
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                return payload
+            # Build in progress: wait for it rather than serve an older payload.
+            # Not published by this process (e.g. after a restart): build it now.
+            version, future = self._pending.get(key, (None, None))
+            if version != self._version:
+                future = self._submit_locked(question_id, correct_answer)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            return None
+        except Exception as e:
+            # Drop the failed build (the done-callback may not have run yet) so the next rerun retries
+            self._discard(key, future)
+            print(f"Error building results for Q{question_id}: {e}")
+            return None
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._payloads.clear()
+            self._pending.clear()
+
+    def _submit_locked(self, question_id, correct_answer):
+        key = (question_id, correct_answer)
+        future = self._executor.submit(self._build, question_id, correct_answer, self._version)
+        self._pending[key] = (self._version, future)
+        # Drops finished builds, including failed ones so the next get() retries
+        future.add_done_callback(lambda done: self._discard(key, done))
+        return future
+
+    def _discard(self, key, future):
+        with self._lock:
+            if self._pending.get(key, (None, None))[1] is future:
+                del self._pending[key]
+
+    def _build(self, question_id, correct_answer, version):
+        votes, counts, ranking = self.db.get_reveal_inputs(question_id)
+
+        users = {}
+        for rank, row in enumerate(ranking, start=1):
+            answer = votes.get(row["username"])
+            users[row["username"]] = {
+                "answer": answer,
+                "correct": answer == correct_answer,
+                "score": row["score"],
+                "rank": rank,
+            }
+
+        with self._lock:
+            payload = {
+                "version": version,
+                "question_id": question_id,
+                "correct_answer": correct_answer,
+                "total_votes": sum(row["count"] for row in counts),
+                "correct_count": sum(row["count"] for row in counts if row["selected_option"] == correct_answer),
+                "counts": counts,
+                "leaderboard": [dict(row, Rank=rank) for rank, row in enumerate(ranking[:self.top_k], start=1)],
+                "users": users,
+            }
+            # A newer publish or a reset happened while building: hand the result
+            # to waiters but don't keep it
+            if version == self._version:
+                self._payloads[(question_id, correct_answer)] = payload
+        return payload
@@ -0,0 +1,204 @@
+import os
+import struct
+import threading
+import time
+import zlib
+
+# File layout: MAGIC, then a zlib-compressed body of
+#   header:    saved_at (d), current_question_id (I), is_active (B),
+#              correct_answer (c, b"\0" if none), duration_seconds (I),
+#              start_time (str)
+#   names:     count (I), then one str per name
+#   users:     count (I), then (name index (I), score (i)) per user
+#   questions: count (I), then per question: question_id (I), vote count (I),
+#              then (name index (I), option (c)) per vote
+# where str is a 4-byte length followed by UTF-8 bytes (usernames are free text).
+MAGIC = b"IQSNAP3\n"
+_HEADER = struct.Struct("<dIBcI")
+_COUNT = struct.Struct("<I")
+_USER = struct.Struct("<Ii")
+_QUESTION = struct.Struct("<II")
+_VOTE = struct.Struct("<Ic")
+_STR_LEN = struct.Struct("<I")
+
+
+def _pack_str(value):
+    data = (value or "").encode("utf-8")
+    return _STR_LEN.pack(len(data)) + data
+
+
+def _unpack_str(buf, offset):
+    (length,) = _STR_LEN.unpack_from(buf, offset)
+    offset += _STR_LEN.size
+    return buf[offset:offset + length].decode("utf-8"), offset + length
+
+
+def _unpack_count(buf, offset):
+    (count,) = _COUNT.unpack_from(buf, offset)
+    return count, offset + _COUNT.size
+
+
+def encode_snapshot(state, saved_at=None):
+    """Serialize a QuizDatabase.dump_state() dict."""
+    names = {}
+
+    def name_index(username):
+        if username not in names:
+            names[username] = len(names)
+        return names[username]
+
+    user_rows = [_USER.pack(name_index(username), score) for username, score in state["users"]]
+
+    questions = {}
+    for question_id, username, selected_option in state["responses"]:
+        option = (selected_option or "\0").encode("ascii")[:1]
+        questions.setdefault(question_id, []).append(_VOTE.pack(name_index(username), option))
+
+    room_state = state["room_state"]
+    correct = (room_state["correct_answer"] or "\0").encode("ascii")[:1]
+    parts = [
+        _HEADER.pack(saved_at if saved_at is not None else time.time(),
+                     room_state["current_question_id"], int(room_state["is_active"]),
+                     correct, room_state["duration_seconds"]),
+        _pack_str(room_state["start_time"]),
+        _COUNT.pack(len(names)),
+    ]
+    # dicts keep insertion order, so positions match the indices handed out above
+    parts.extend(_pack_str(username) for username in names)
+    parts.append(_COUNT.pack(len(user_rows)))
+    parts.extend(user_rows)
+    parts.append(_COUNT.pack(len(questions)))
+    for question_id, votes in questions.items():
+        parts.append(_QUESTION.pack(question_id, len(votes)))
+        parts.extend(votes)
+    return MAGIC + zlib.compress(b"".join(parts))
+
+
+def decode_snapshot(data):
+    """Inverse of encode_snapshot. Returns (saved_at, state)."""
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a quiz snapshot")
+    buf = zlib.decompress(data[len(MAGIC):])
+
+    saved_at, current_q_id, is_active, correct, duration = _HEADER.unpack_from(buf, 0)
+    start_time, offset = _unpack_str(buf, _HEADER.size)
+    room_state = {
+        "current_question_id": current_q_id,
+        "is_active": bool(is_active),
+        "correct_answer": None if correct == b"\0" else correct.decode("ascii"),
+        "start_time": start_time or None,
+        "duration_seconds": duration,
+    }
+
+    name_count, offset = _unpack_count(buf, offset)
+    names = []
+    for _ in range(name_count):
+        name, offset = _unpack_str(buf, offset)
+        names.append(name)
+
+    user_count, offset = _unpack_count(buf, offset)
+    end = offset + user_count * _USER.size
+    users = [(names[index], score) for index, score in _USER.iter_unpack(buf[offset:end])]
+    offset = end
+
+    question_count, offset = _unpack_count(buf, offset)
+    responses = []
+    for _ in range(question_count):
+        question_id, vote_count = _QUESTION.unpack_from(buf, offset)
+        offset += _QUESTION.size
+        end = offset + vote_count * _VOTE.size
+        responses.extend(
+            (question_id, names[index], None if option == b"\0" else option.decode("ascii"))
+            for index, option in _VOTE.iter_unpack(buf[offset:end])
+        )
+        offset = end
+
+    return saved_at, {"room_state": room_state, "users": users, "responses": responses}
+
+
+class SnapshotService:
+    """Keeps a compact snapshot of a QuizDatabase to rebuild a lost DB file from.
+
+    The SQLite file stays the source of truth, and warming caches on startup is
+    QuizDatabase.warm_cache()'s job. A missing DB file is usually a deliberate
+    fresh start, so snapshots are only written and restored when
+    `rebuild_missing_db` is set (e.g. the container is known to lose its disk).
+    """
+
+    def __init__(self, db, snapshot_path=None, interval_seconds=10, rebuild_missing_db=False):
+        self.db = db
+        self.snapshot_path = snapshot_path or os.path.splitext(db.db_path)[0] + ".snapshot"
+        self.rebuild_missing_db = rebuild_missing_db
+        self.interval_seconds = interval_seconds
+        self.saved_version = None
+        self.last_save_seconds = None
+        self.last_restore_seconds = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def save(self, force=False):
+        """Write a snapshot if the DB changed since the last one. Returns True if written."""
+        with self._lock:
+            version = self.db.write_version
+            if not force and version == self.saved_version:
+                return False
+            started = time.perf_counter()
+            data = encode_snapshot(self.db.dump_state())
+            # Write then rename so a crash mid-write never leaves a torn snapshot
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self.saved_version = version
+            self.last_save_seconds = time.perf_counter() - started
+            return True
+
+    def restore(self):
+        """Rebuild a missing DB file from the snapshot. Returns True if one was applied."""
+        if not self.db.is_new:
+            return False
+        started = time.perf_counter()
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                _, state = decode_snapshot(f.read())
+        except FileNotFoundError:
+            return False
+        except (ValueError, struct.error, zlib.error, IndexError) as e:
+            print(f"Ignoring unreadable snapshot {self.snapshot_path}: {e}")
+            return False
+
+        if not self.rebuild_missing_db:
+            print(f"WARNING: {self.db.db_path} is missing but {self.snapshot_path} exists. "
+                  f"Starting with an empty room and ignoring the snapshot; enable "
+                  f"rebuild_missing_db (QUIZ_REBUILD_FROM_SNAPSHOT=1) to restore it instead.")
+            return False
+        print(f"WARNING: {self.db.db_path} is missing, rebuilding it from {self.snapshot_path}")
+        self.db.load_state(state)
+        self.saved_version = self.db.write_version
+        self.last_restore_seconds = time.perf_counter() - started
+        print(f"Restored snapshot {self.snapshot_path}: {len(state['users'])} users, "
+              f"{len(state['responses'])} responses in {self.last_restore_seconds * 1000:.1f} ms")
+        return True
+
+    def start(self):
+        # Without rebuilds nothing reads the snapshot, so don't pay for writing it
+        if self.rebuild_missing_db and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="quiz-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.save()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.save()
+            except Exception as e:
+                print(f"Error writing snapshot: {e}")
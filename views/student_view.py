@@ -1,5 +1,6 @@
 import streamlit as st
 import extra_streamlit_components as stx
+from datetime import datetime
 from streamlit_autorefresh import st_autorefresh
 
 def get_cookie_manager():
@@ -7,15 +8,6 @@ def get_cookie_manager():
 
 def student_view(db):
     st_autorefresh(interval=5000, key="student_refresh") # Increased to 5s
-    
-    # Caching Helpers
-    @st.cache_data(ttl=2)
-    def cached_get_response_counts(q_id):
-        return db.get_response_counts(q_id)
-        
-    @st.cache_data(ttl=5)
-    def cached_get_leaderboard(limit=10):
-        return db.get_leaderboard(limit)
 
     st.header("🎓 Student Portal")
     
@@ -66,7 +58,11 @@ def student_view(db):
     # Check if already voted for this question locally to disable buttons immediately
     # (Optional optimization, but good for UX)
     if "last_voted_q" not in st.session_state:
-        st.session_state["last_voted_q"] = -1
+        # New session (e.g. after a server restart): recover the vote from the DB cache
+        if db.get_user_response(current_q_id, username):
+            st.session_state["last_voted_q"] = current_q_id
+        else:
+            st.session_state["last_voted_q"] = -1
         
     if is_active:
         st.subheader(f"❓ Question {current_q_id}")
@@ -75,9 +71,6 @@ def student_view(db):
         has_voted = st.session_state.get("last_voted_q") == current_q_id
 
         # Timer Logic
-        import time
-        from datetime import datetime
-        
         remaining_time = 0
         is_expired = False
         
@@ -169,9 +162,16 @@ def student_view(db):
     else:
         st.warning("⏳ Waiting for the next question...")
         if room_state["correct_answer"]:
-             # Check if user got it right
+             # Everything below comes from one precomputed payload shared by all students
              prev_q_id = current_q_id - 1
-             user_ans = db.get_user_response(prev_q_id, username)
+             results = db.get_results(prev_q_id, room_state["correct_answer"])
+             if results is None:
+                 st.info("⏳ Calculating results...")
+                 return
+             my_result = results["users"].get(username, {"answer": None, "score": 0, "rank": None})
+             
+             # Check if user got it right
+             user_ans = my_result["answer"]
              
              if user_ans == room_state["correct_answer"]:
                  # Check if we already celebrated this specific question
@@ -187,21 +187,22 @@ def student_view(db):
                  st.info(f"The correct answer was **{room_state['correct_answer']}**")
 
              # Show User Score
-             score = db.get_user_score(username)
+             score = my_result["score"]
              st.success(f"🏆 Your Total Score: **{score}**")
 
              st.write("---")
              
              # 1. Poll Results (Bar Chart)
              st.subheader("📊 Class Results")
-             data = cached_get_response_counts(prev_q_id)
-             if not data.empty:
-                 total_votes = data['count'].sum()
-                 if total_votes > 0:
-                     data['percentage'] = (data['count'] / total_votes * 100).round(1)
-                 else:
-                     data['percentage'] = 0
+             data = results["counts"]
+             if data:
+                 total_votes = results["total_votes"]
+                 data = [
+                     dict(row, percentage=round(row['count'] / total_votes * 100, 1) if total_votes > 0 else 0)
+                     for row in data
+                 ]
                 
+                 # Only needed once results are revealed, keep it off the voting path
                  import altair as alt
                  
                  color_scale = alt.Scale(
@@ -209,39 +210,35 @@ def student_view(db):
                     range=['#4CAF50', '#FF9800', '#FFC107', '#2196F3']
                  )
                  
-                 chart = alt.Chart(data).mark_bar().encode(
-                     x=alt.X('selected_option', title='Option'),
-                     y=alt.Y('percentage', title='Percentage %'),
-                     color=alt.Color('selected_option', scale=color_scale, legend=None),
-                     tooltip=['selected_option', 'count', 'percentage']
+                 chart = alt.Chart(alt.Data(values=data)).mark_bar().encode(
+                     x=alt.X('selected_option:N', title='Option'),
+                     y=alt.Y('percentage:Q', title='Percentage %'),
+                     color=alt.Color('selected_option:N', scale=color_scale, legend=None),
+                     tooltip=['selected_option:N', 'count:Q', 'percentage:Q']
                  ).properties(height=200)
                  
                  st.altair_chart(chart, use_container_width=True)
             
              # 2. Leaderboard & Position
              st.subheader("🥇 Leaderboard")
-             # Fetch more users to find rank
-             leaderboard_df = cached_get_leaderboard(limit=100) 
+             # Top 100 with ranks; the user's own rank is in their payload entry
+             leaderboard = results["leaderboard"]
              
-             if not leaderboard_df.empty:
-                 # Calculate Rank
-                 # Sort by score desc (db does this, but ensure)
-                 # reset_index to get 0-based rank, add 1
-                 leaderboard_df['Rank'] = leaderboard_df.index + 1
-                 
-                 # Find current user
-                 user_row = leaderboard_df[leaderboard_df['username'] == username]
+             if leaderboard:
+                 my_rank = my_result["rank"]
                  
-                 if not user_row.empty:
-                     my_rank = user_row.iloc[0]['Rank']
+                 if my_rank is not None and my_rank <= len(leaderboard):
                      st.info(f"You are currently **#{my_rank}** on the whiteboard.")
                      
+                     # The highlight needs a Styler; pandas is only loaded on this reveal branch
+                     import pandas as pd
+                     
                      # Highlight user in the table
                      def highlight_user(row):
                          return ['background-color: #ffeb3b; color: black'] * len(row) if row['username'] == username else [''] * len(row)
                      
                      st.dataframe(
-                         leaderboard_df[['Rank', 'username', 'score']].style.apply(highlight_user, axis=1),
+                         pd.DataFrame(leaderboard, columns=['Rank', 'username', 'score']).style.apply(highlight_user, axis=1),
                          use_container_width=True,
                          hide_index=True
                      )
@@ -249,7 +246,10 @@ def student_view(db):
                      st.write("You are not in the top 100 yet.")
 
 def submit_answer(db, q_id, username, option):
-    db.submit_response(q_id, username, option)
+    if not db.submit_response(q_id, username, option):
+        # Throttled by the per-user vote limit, or the DB stayed locked
+        st.error("⚠️ Your vote was not recorded. Please wait a moment and try again.")
+        return
     st.session_state["last_voted_q"] = q_id
     st.balloons()
     st.rerun()
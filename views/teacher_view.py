@@ -1,5 +1,6 @@
 import streamlit as st
 import altair as alt
+from datetime import datetime
 from streamlit_autorefresh import st_autorefresh
 
 def teacher_view(db):
@@ -53,8 +54,6 @@ def teacher_view(db):
         # Actions
         # Actions
         if st.button("🚀 START VOTING", type="primary", disabled=is_active, use_container_width=True):
-            from datetime import datetime
-            
             # Storing naive timestamp for simplicity or UTC
             now_iso = datetime.now().isoformat()
             db.update_room_state(is_active=True, start_time=now_iso, duration_seconds=duration)
@@ -152,6 +151,17 @@ def teacher_view(db):
         # But we are inside `col_controls`.
         # Taking a risk with nth-of-type, user can verify.
         
+        # Admission control counters, to see throttling/shedding during the voting spike
+        with st.expander("⚙️ Server Load"):
+            stats = db.get_load_stats()
+            load_col1, load_col2 = st.columns(2)
+            load_col1.metric("Votes accepted", stats["votes_accepted"])
+            load_col2.metric("Votes throttled", stats["votes_throttled"])
+            load_col1.metric("DB reads", stats["reads_executed"])
+            load_col2.metric("Reads coalesced", stats["reads_coalesced"])
+            load_col1.metric("Reads shed", stats["reads_shed"])
+            load_col2.metric("Peak in-flight", stats["peak_in_flight"])
+
         st.write("---")
         if st.button("🚨 RESET SYSTEM", type="secondary"):
             db.reset_game()
@@ -164,7 +174,6 @@ def teacher_view(db):
         # Timer Logic for Display (Keep calculation here or in controls, need variable for both)
         remaining_time = 0
         if is_active and room_state.get('start_time'):
-            from datetime import datetime
             start_dt = datetime.fromisoformat(room_state['start_time'])
             elapsed = (datetime.now() - start_dt).total_seconds()
             remaining_time = max(0, room_state['duration_seconds'] - elapsed)
@@ -196,11 +205,11 @@ def teacher_view(db):
             # Live Chart
             data = cached_get_response_counts(current_q_id)
             
-            chart = alt.Chart(data).mark_bar().encode(
-                x=alt.X('selected_option', title='Option'),
-                y=alt.Y('count', title='Votes'),
-                color=alt.Color('selected_option', scale=color_scale, legend=None),
-                tooltip=['selected_option', 'count']
+            chart = alt.Chart(alt.Data(values=data)).mark_bar().encode(
+                x=alt.X('selected_option:N', title='Option'),
+                y=alt.Y('count:Q', title='Votes'),
+                color=alt.Color('selected_option:N', scale=color_scale, legend=None),
+                tooltip=['selected_option:N', 'count:Q']
             ).properties(
                 height=400,
                 title='Live Responses'
@@ -208,8 +217,8 @@ def teacher_view(db):
             
             st.altair_chart(chart, use_container_width=True)
             
-            total_votes = data['count'].sum()
-            st.metric("Total Votes", int(total_votes))
+            total_votes = sum(row['count'] for row in data)
+            st.metric("Total Votes", total_votes)
             
         else:
             st.info(f"⏸️ **Ready for Question {current_q_id}**")
@@ -219,18 +228,19 @@ def teacher_view(db):
                 prev_q_id = max(1, current_q_id - 1)
                 st.write(f"### Previous Result (Q{prev_q_id}): **{room_state['correct_answer']}**")
                 
-                # Show Chart for Previous Question
-                data = cached_get_response_counts(prev_q_id)
+                # Show Chart for Previous Question (same payload the students see)
+                results = db.get_results(prev_q_id, room_state['correct_answer'])
+                data = results["counts"] if results else cached_get_response_counts(prev_q_id)
                 
                 # Highlight logic: Keep colors but maybe dim incorrect ones? 
                 # Or just show the colors as is, and user knows which is correct.
                 # User asked to match buttons. So we stick to scale.
                 
-                chart = alt.Chart(data).mark_bar().encode(
-                    x=alt.X('selected_option', title='Option'),
-                    y=alt.Y('count', title='Votes'),
-                    color=alt.Color('selected_option', scale=color_scale, legend=None),
-                    tooltip=['selected_option', 'count']
+                chart = alt.Chart(alt.Data(values=data)).mark_bar().encode(
+                    x=alt.X('selected_option:N', title='Option'),
+                    y=alt.Y('count:Q', title='Votes'),
+                    color=alt.Color('selected_option:N', scale=color_scale, legend=None),
+                    tooltip=['selected_option:N', 'count:Q']
                 ).properties(
                     height=300,
                     title=f'Results for Q{prev_q_id}'
@@ -249,5 +259,9 @@ def finish_question(db, q_id, answer):
     # Auto-advance: Increment ID, Stop Active, Set Answer
     db.update_room_state(current_question_id=q_id + 1, is_active=False, correct_answer=answer)
     
+    # Build tally/leaderboard/per-student results once in the background;
+    # student reruns read that payload instead of querying individually
+    db.publish_results(q_id, answer)
+    
     st.toast(f"Q{q_id} Closed! {count} correct. Move to Q{q_id+1}.")
     st.rerun()